@@ -93,6 +93,7 @@ setup(
         "isodate",
         "markdown>=3.0",
         "msgpack>=1.0.0, <1.1",
+        "nh3>=0.2.11, <0.3",
         "numpy==1.22.1",
         "pandas>=1.3.0, <1.4",
         "parsedatetime",
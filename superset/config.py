@@ -1075,6 +1075,10 @@ ALERT_REPORTS_NOTIFICATION_DRY_RUN = False
 
 # A custom prefix to use on all Alerts & Reports emails
 EMAIL_REPORTS_SUBJECT_PREFIX = "[Report] "
+# Maximum number of emails of a single Alert & Report sent at once, each over its
+# own SMTP connection. Raise it to send reports with many email recipients faster,
+# as long as your SMTP server accepts that many concurrent connections
+EMAIL_REPORTS_MAX_CONCURRENT_SENDS = 1
 
 # Slack API token for the superset reports, either string or callable
 SLACK_API_TOKEN: Optional[Union[Callable[[], str], str]] = None
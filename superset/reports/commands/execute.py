@@ -63,6 +63,7 @@ from superset.reports.dao import (
 )
 from superset.reports.notifications import create_notification
 from superset.reports.notifications.base import NotificationContent
+from superset.reports.notifications.email import EmailNotification
 from superset.reports.notifications.exceptions import NotificationError
 from superset.utils.celery import session_scope
 from superset.utils.csv import get_chart_csv_data, get_chart_dataframe
@@ -382,6 +383,7 @@ class BaseReportState:
         :raises: ReportScheduleNotificationError
         """
         notification_errors = []
+        email_notifications = []
         for recipient in recipients:
             notification = create_notification(recipient, notification_content)
             try:
@@ -391,11 +393,21 @@ class BaseReportState:
                         self._report_schedule.name,
                         recipient.recipient_config_json,
                     )
+                elif isinstance(notification, EmailNotification):
+                    # emails are sent together below
+                    email_notifications.append(notification)
                 else:
                     notification.send()
             except NotificationError as ex:
                 # collect notification errors but keep processing them
                 notification_errors.append(str(ex))
+        notification_errors.extend(
+            str(ex)
+            for ex in EmailNotification.send_many(
+                email_notifications,
+                concurrency=app.config["EMAIL_REPORTS_MAX_CONCURRENT_SENDS"],
+            )
+        )
         if notification_errors:
             raise ReportScheduleNotificationError(";".join(notification_errors))
 
@@ -15,158 +15,387 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import itertools
 import json
 import logging
-import textwrap
-from dataclasses import dataclass
-from email.utils import make_msgid, parseaddr
-from typing import Any, Dict, Optional
+import re
+import secrets
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import parseaddr
+from functools import lru_cache
+from html import escape
+from typing import Any, Dict, Iterator, List, Match, NamedTuple, Optional
 
-import bleach
-from flask_babel import gettext as __
+import nh3
+from flask import g
+from flask.ctx import AppContext
+from flask_babel import get_locale, gettext as __
 
 from superset import app
-from superset.models.reports import ReportRecipientType
+from superset.models.reports import ReportRecipients, ReportRecipientType
 from superset.reports.notifications.base import BaseNotification
 from superset.reports.notifications.exceptions import NotificationError
-from superset.utils.core import send_email_smtp
+from superset.utils.core import InlineImage, send_email_smtp, SMTPSession
 from superset.utils.decorators import statsd_gauge
 from superset.utils.urls import modify_url_query
 
 logger = logging.getLogger(__name__)
 
-TABLE_TAGS = ["table", "th", "tr", "td", "thead", "tbody", "tfoot"]
-TABLE_ATTRIBUTES = ["colspan", "rowspan", "halign", "border", "class"]
 
+def _minify_html(html: str) -> str:
+    """
+    Collapses the indentation and the whitespace between the tags of static
+    markup, only meant to run once at import time
+    """
+    return re.sub(r">\s+<", "><", re.sub(r"\s{2,}", " ", html)).strip()
+
+
+# Static head and tail of the email body, only the content in between is
+# formatted per email. All of them are minified once to keep emails small
+_BODY_PREFIX = _minify_html(
+    """
+<html>
+  <head>
+    <style type="text/css">
+      table, th, td {
+        border-collapse: collapse;
+        border-color: rgb(200, 212, 227);
+        color: rgb(42, 63, 95);
+        padding: 4px 8px;
+      }
+      .image{
+          margin-bottom: 18px;
+      }
+    </style>
+  </head>
+  <body>
+"""
+)
+_BODY_CONTENT_TEMPLATE = _minify_html(
+    """
+    <p>{description}</p>
+    <b><a href="{url}">{call_to_action}</a></b><p></p>
+    {html_table}
+    {img_tag}
+"""
+)
+_BODY_SUFFIX = _minify_html(
+    """
+  </body>
+</html>
+"""
+)
+
+# Markup and link schemes allowed in report descriptions, the same as bleach's
+# defaults
+_DESCRIPTION_TAGS = {
+    "a",
+    "abbr",
+    "acronym",
+    "b",
+    "blockquote",
+    "code",
+    "em",
+    "i",
+    "li",
+    "ol",
+    "strong",
+    "ul",
+}
+_DESCRIPTION_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "abbr": {"title"},
+    "acronym": {"title"},
+}
+_DESCRIPTION_URL_SCHEMES = {"http", "https", "mailto"}
+
+# Matches an opening or closing tag, capturing its name
+_TAG_RE = re.compile(r"</?([a-zA-Z][^\s/>]*)[^>]*>")
+
+# Characters that the sanitizer escapes or drops, text without any of them is
+# returned unchanged
+_NEEDS_SANITIZING_RE = re.compile(r"[<>&\x00\r\xa0]")
+
+_CONTENT_ID_COUNTER = itertools.count()
+
+# The img tags of the inline images are the content ids joined between these,
+# which avoids formatting a template per image
+_IMG_TAG_PREFIX = '<div class="image"><img width="1000px" src="cid:'
+_IMG_TAG_SUFFIX = '"></div>\n'
+_IMG_TAG_SEPARATOR = _IMG_TAG_SUFFIX + _IMG_TAG_PREFIX
+
+# Email contents rendered for each notification content, keyed on the content's
+# id. All the email recipients of a report share one notification content, so
+# its body and images are only rendered once; entries are dropped as soon as
+# the notification content is garbage collected
+_RENDERED_CONTENTS: Dict[int, "EmailContent"] = {}
+# Held while rendering, so concurrent sends of the same content wait for a
+# single render instead of all running their own
+_RENDER_LOCK = threading.Lock()
+
+
+def _make_content_id(domain: str) -> str:
+    """
+    Returns a unique inline image content id, without the < >. A process wide
+    counter plus a random token is unique without the clock and pid lookups of
+    email.utils.make_msgid
+    """
+    return f"{next(_CONTENT_ID_COUNTER)}.{secrets.token_hex(8)}@{domain}"
+
+
+def _escape_disallowed_tag(match: Match[str]) -> str:
+    """
+    Escapes a tag that isn't allowed in descriptions, so it's shown as text the
+    way bleach did rather than stripped by the sanitizer
+    """
+    tag = match.group(0)
+    if match.group(1).lower() in _DESCRIPTION_TAGS:
+        return tag
+    return escape(tag, quote=False)
+
+
+@lru_cache(maxsize=1)
+def _get_email_domain(address: str) -> str:
+    """
+    Returns the domain of an email address, cached since it's always called
+    with the configured SMTP sender
+    """
+    return parseaddr(address)[1].split("@")[1]
+
+
+@lru_cache(maxsize=256)
+def _parse_target(recipient_config_json: str) -> str:
+    """
+    Returns the email addresses of a recipient config, cached on the raw JSON
+    since the same recipients are sent to on every run of a report
+    """
+    return json.loads(recipient_config_json)["target"]
 
-@dataclass
-class EmailContent:
+
+@lru_cache(maxsize=64)
+def _translate(message: str, locale: str) -> str:  # pylint: disable=unused-argument
+    """
+    Returns the translation of a static message, cached per locale, which is
+    only used as the cache key
+    """
+    return __(message)
+
+
+class EmailContent(NamedTuple):
     body: str
     data: Optional[Dict[str, Any]] = None
     images: Optional[Dict[str, bytes]] = None
 
 
-class EmailNotification(BaseNotification):  # pylint: disable=too-few-public-methods
+class EmailNotification(BaseNotification):
     """
     Sends an email notification for a report recipient
     """
 
     type = ReportRecipientType.EMAIL
 
+    @staticmethod
+    @contextmanager
+    def open_session() -> Iterator[None]:
+        """
+        Shares a single SMTP connection between all the email notifications sent
+        within the block, the connection is only opened when the first one is sent
+        """
+        if g.get("smtp_session") is not None:
+            # already inside a session, keep using it
+            yield
+            return
+        with SMTPSession(app.config) as session:
+            g.smtp_session = session
+            try:
+                yield
+            finally:
+                g.pop("smtp_session", None)
+
+    @classmethod
+    def send_many(
+        cls, notifications: List["EmailNotification"], concurrency: int = 1
+    ) -> List[NotificationError]:
+        """
+        Sends several email notifications, up to ``concurrency`` of them at once.
+        Each worker thread reuses its own SMTP connection for all its emails
+
+        :returns: The errors of the notifications that failed to send
+        """
+
+        def send(notification: "EmailNotification") -> Optional[NotificationError]:
+            try:
+                notification.send()
+            except NotificationError as ex:
+                return ex
+            return None
+
+        if len(notifications) <= 1 or concurrency <= 1:
+            with cls.open_session():
+                results = [send(notification) for notification in notifications]
+            return [error for error in results if error is not None]
+
+        config = app.config
+        worker = threading.local()
+        sessions: List[SMTPSession] = []
+
+        def send_in_worker(
+            notification: "EmailNotification", app_context: AppContext
+        ) -> Optional[NotificationError]:
+            if not hasattr(worker, "session"):
+                worker.session = SMTPSession(config)
+                sessions.append(worker.session)
+            with app_context:
+                g.smtp_session = worker.session
+                return send(notification)
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(
+                    executor.map(
+                        send_in_worker,
+                        notifications,
+                        [app.app_context() for _ in notifications],
+                    )
+                )
+        finally:
+            for session in sessions:
+                session.close()
+        return [error for error in results if error is not None]
+
     @staticmethod
     def _get_smtp_domain() -> str:
-        return parseaddr(app.config["SMTP_MAIL_FROM"])[1].split("@")[1]
+        return _get_email_domain(app.config["SMTP_MAIL_FROM"])
 
     @staticmethod
     def _error_template(text: str) -> str:
-        return __(
+        return _translate(
             """
             Error: %(text)s
             """,
-            text=text,
-        )
+            str(get_locale()),
+        ) % {"text": text}
 
     def _get_content(self) -> EmailContent:
-        if self._content.text:
-            return EmailContent(body=self._error_template(self._content.text))
+        key = id(self._content)
+        content = _RENDERED_CONTENTS.get(key)
+        if content is None:
+            with _RENDER_LOCK:
+                # another thread may have rendered it while this one waited
+                content = _RENDERED_CONTENTS.get(key)
+                if content is None:
+                    content = _RENDERED_CONTENTS[key] = self._render_content()
+                    weakref.finalize(self._content, _RENDERED_CONTENTS.pop, key, None)
+        return content
+
+    def _render_content(self) -> EmailContent:
+        content = self._content
+        if content.text:
+            return EmailContent(body=self._error_template(content.text))
         # Get the domain from the 'From' address ..
-        # and make a message id without the < > in the end
-        csv_data = None
-        domain = self._get_smtp_domain()
+        # and make unique content ids for the inline images, without the < >.
+        # The images are base64 encoded once for all the emails they're sent in
         images = {}
-
-        if self._content.screenshots:
+        img_tag = ""
+        if content.screenshots:
+            domain = self._get_smtp_domain()
             images = {
-                make_msgid(domain)[1:-1]: screenshot
-                for screenshot in self._content.screenshots
+                _make_content_id(domain): InlineImage(screenshot)
+                for screenshot in content.screenshots
             }
+            img_tag = "".join(
+                (_IMG_TAG_PREFIX, _IMG_TAG_SEPARATOR.join(images), _IMG_TAG_SUFFIX)
+            )
 
-        # Strip any malicious HTML from the description
-        description = bleach.clean(self._content.description or "")
-
-        # Strip malicious HTML from embedded data, allowing only table elements
-        if self._content.embedded_data is not None:
-            df = self._content.embedded_data
-            html_table = bleach.clean(
-                df.to_html(na_rep="", index=True),
-                tags=TABLE_TAGS,
-                attributes=TABLE_ATTRIBUTES,
+        # Escape the tags that aren't allowed in the description and strip any
+        # other malicious HTML, plain text would come out of the sanitizer
+        # unchanged so it's used as is
+        description = content.description or ""
+        if _NEEDS_SANITIZING_RE.search(description):
+            description = nh3.clean(
+                _TAG_RE.sub(_escape_disallowed_tag, description),
+                tags=_DESCRIPTION_TAGS,
+                attributes=_DESCRIPTION_ATTRIBUTES,
+                url_schemes=_DESCRIPTION_URL_SCHEMES,
             )
+
+        # Embedded data is rendered by pandas, which escapes every cell and label,
+        # so the generated table needs no further sanitization
+        if content.embedded_data is not None:
+            df = content.embedded_data
+            html_table = df.to_html(na_rep="", index=True, escape=True)
         else:
             html_table = ""
 
-        call_to_action = __("Explore in Superset")
+        call_to_action = _translate("Explore in Superset", str(get_locale()))
         url = (
-            modify_url_query(self._content.url, standalone="0")
-            if self._content.url is not None
+            modify_url_query(content.url, standalone="0")
+            if content.url is not None
             else ""
         )
-        img_tags = []
-        for msgid in images.keys():
-            img_tags.append(
-                f"""<div class="image">
-                    <img width="1000px" src="cid:{msgid}">
-                </div>
-                """
+        body = "".join(
+            (
+                _BODY_PREFIX,
+                _BODY_CONTENT_TEMPLATE.format(
+                    description=description,
+                    url=url,
+                    call_to_action=call_to_action,
+                    html_table=html_table,
+                    img_tag=img_tag,
+                ),
+                _BODY_SUFFIX,
             )
-        img_tag = "".join(img_tags)
-        body = textwrap.dedent(
-            f"""
-            <html>
-              <head>
-                <style type="text/css">
-                  table, th, td {{
-                    border-collapse: collapse;
-                    border-color: rgb(200, 212, 227);
-                    color: rgb(42, 63, 95);
-                    padding: 4px 8px;
-                  }}
-                  .image{{
-                      margin-bottom: 18px;
-                  }}
-                </style>
-              </head>
-              <body>
-                <p>{description}</p>
-                <b><a href="{url}">{call_to_action}</a></b><p></p>
-                {html_table}
-                {img_tag}
-              </body>
-            </html>
-            """
         )
 
-        if self._content.csv:
-            csv_data = {__("%(name)s.csv", name=self._content.name): self._content.csv}
+        csv_data = (
+            {__("%(name)s.csv", name=content.name): content.csv}
+            if content.csv
+            else None
+        )
         return EmailContent(body=body, images=images, data=csv_data)
 
     def _get_subject(self) -> str:
-        return __(
-            "%(prefix)s %(title)s",
-            prefix=app.config["EMAIL_REPORTS_SUBJECT_PREFIX"],
-            title=self._content.name,
-        )
+        return _translate("%(prefix)s %(title)s", str(get_locale())) % {
+            "prefix": app.config["EMAIL_REPORTS_SUBJECT_PREFIX"],
+            "title": self._content.name,
+        }
 
-    def _get_to(self) -> str:
-        return json.loads(self._recipient.recipient_config_json)["target"]
+    @staticmethod
+    def _get_target(recipient: ReportRecipients) -> str:
+        return _parse_target(recipient.recipient_config_json)
 
-    @statsd_gauge("reports.email.send")
     def send(self) -> None:
+        self.send_batch([self._recipient])
+
+    @statsd_gauge("reports.email.send")
+    def send_batch(self, recipients: List[ReportRecipients]) -> None:
+        """
+        Sends this notification's content to several recipients as a single email.
+        The first recipient's targets are addressed directly and the other ones
+        are blind copied, the body and images are only built once
+
+        :raises: NotificationError
+        """
+        if not recipients:
+            raise NotificationError("No recipients to send the email to")
         subject = self._get_subject()
         content = self._get_content()
-        to = self._get_to()
+        to, *bcc = [self._get_target(recipient) for recipient in recipients]
         try:
             send_email_smtp(
                 to,
                 subject,
                 content.body,
                 app.config,
-                files=[],
                 data=content.data,
                 images=content.images,
-                bcc="",
+                bcc=",".join(bcc),
                 mime_subtype="related",
                 dryrun=False,
+                smtp_session=g.get("smtp_session"),
             )
             logger.info("Report sent to email")
         except Exception as ex:
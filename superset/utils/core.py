@@ -35,12 +35,14 @@ import zlib
 from contextlib import contextmanager
 from datetime import date, datetime, time, timedelta
 from distutils.util import strtobool
+from email import encoders
 from email.mime.application import MIMEApplication
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formatdate
 from enum import Enum, IntEnum
+from functools import cached_property
 from io import BytesIO
 from timeit import default_timer
 from types import TracebackType
@@ -892,6 +894,19 @@ def notify_user_about_perm_udate(  # pylint: disable=too-many-arguments
     )
 
 
+class InlineImage(bytes):
+    """
+    Image bytes to embed in emails. The base64 encoding of its MIME part is only
+    computed once, and reused by every email the image is attached to
+    """
+
+    @cached_property
+    def encoded(self) -> Tuple[str, str]:
+        """The image subtype and its base64 encoded payload"""
+        image = MIMEImage(self)
+        return image.get_content_subtype(), image.get_payload()
+
+
 def send_email_smtp(  # pylint: disable=invalid-name,too-many-arguments,too-many-locals
     to: str,
     subject: str,
@@ -904,11 +919,15 @@ def send_email_smtp(  # pylint: disable=invalid-name,too-many-arguments,too-many
     cc: Optional[str] = None,
     bcc: Optional[str] = None,
     mime_subtype: str = "mixed",
+    smtp_session: Optional["SMTPSession"] = None,
 ) -> None:
     """
     Send an email with html content, eg:
     send_email_smtp(
         'test@example.com', 'foo', '<b>Foo</b> bar',['/dev/null'], dryrun=True)
+
+    Pass an open ``SMTPSession`` as ``smtp_session`` to reuse its connection
+    instead of connecting to the SMTP server for this email alone.
     """
     smtp_mail_from = config["SMTP_MAIL_FROM"]
     smtp_mail_to = get_email_address_list(to)
@@ -959,41 +978,123 @@ def send_email_smtp(  # pylint: disable=invalid-name,too-many-arguments,too-many
     for msgid, imgdata in (images or {}).items():
         formatted_time = formatdate(localtime=True)
         file_name = f"{subject} {formatted_time}"
-        image = MIMEImage(imgdata, name=file_name)
+        if isinstance(imgdata, InlineImage):
+            subtype, payload = imgdata.encoded
+            image = MIMEImage(b"", subtype, encoders.encode_noop, name=file_name)
+            image.set_payload(payload)
+            image["Content-Transfer-Encoding"] = "base64"
+        else:
+            image = MIMEImage(imgdata, name=file_name)
         image.add_header("Content-ID", "<%s>" % msgid)
         image.add_header("Content-Disposition", "inline")
         msg.attach(image)
 
-    send_mime_email(smtp_mail_from, recipients, msg, config, dryrun=dryrun)
+    send_mime_email(
+        smtp_mail_from, recipients, msg, config, dryrun=dryrun, session=smtp_session
+    )
 
 
-def send_mime_email(
-    e_from: str,
-    e_to: List[str],
-    mime_msg: MIMEMultipart,
-    config: Dict[str, Any],
-    dryrun: bool = False,
-) -> None:
-    smtp_host = config["SMTP_HOST"]
-    smtp_port = config["SMTP_PORT"]
-    smtp_user = config["SMTP_USER"]
-    smtp_password = config["SMTP_PASSWORD"]
-    smtp_starttls = config["SMTP_STARTTLS"]
-    smtp_ssl = config["SMTP_SSL"]
+class SMTPSession:
+    """
+    A connection to the configured SMTP server that can be shared by several
+    emails. It's only opened when the first email is sent. If the server drops it
+    after some emails went through, it's reopened and the email is sent again.
+
+        with SMTPSession(app.config) as session:
+            send_email_smtp(..., smtp_session=session)
+            send_email_smtp(..., smtp_session=session)
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self._config = config
+        self._smtp: Optional[smtplib.SMTP] = None
+        # emails sent over the current connection
+        self._sent = 0
+
+    def __enter__(self) -> "SMTPSession":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp_host = self._config["SMTP_HOST"]
+        smtp_port = self._config["SMTP_PORT"]
+        smtp_user = self._config["SMTP_USER"]
+        smtp_password = self._config["SMTP_PASSWORD"]
 
-    if not dryrun:
         smtp = (
             smtplib.SMTP_SSL(smtp_host, smtp_port)
-            if smtp_ssl
+            if self._config["SMTP_SSL"]
             else smtplib.SMTP(smtp_host, smtp_port)
         )
-        if smtp_starttls:
+        if self._config["SMTP_STARTTLS"]:
             smtp.starttls()
         if smtp_user and smtp_password:
             smtp.login(smtp_user, smtp_password)
+        return smtp
+
+    def _drop(self) -> None:
+        """Forgets a connection the server closed, the next email opens a new one"""
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            smtp.close()
+
+    def _sendmail(self, e_from: str, e_to: List[str], msg: str) -> None:
+        if self._smtp is None:
+            self._smtp = self._connect()
+            self._sent = 0
+        try:
+            self._smtp.sendmail(e_from, e_to, msg)
+        except smtplib.SMTPServerDisconnected:
+            self._drop()
+            raise
+        except smtplib.SMTPResponseException as ex:
+            if ex.smtp_code == 421:
+                # the server is shutting the connection down
+                self._drop()
+            raise
+        self._sent += 1
+
+    def sendmail(self, e_from: str, e_to: List[str], mime_msg: MIMEMultipart) -> None:
+        msg = mime_msg.as_string()
+        reused = self._smtp is not None and self._sent > 0
         logger.debug("Sent an email to %s", str(e_to))
-        smtp.sendmail(e_from, e_to, mime_msg.as_string())
-        smtp.quit()
+        try:
+            self._sendmail(e_from, e_to, msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException):
+            if not reused or self._smtp is not None:
+                raise
+            # The server dropped a connection that had already sent emails, eg. on
+            # an idle timeout or a per connection message limit, so the email is
+            # retried once over a new connection
+            logger.info("SMTP connection lost, reconnecting to send the email")
+            self._sendmail(e_from, e_to, msg)
+
+    def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except smtplib.SMTPServerDisconnected:
+                # the server has already closed the connection
+                pass
+
+
+def send_mime_email(  # pylint: disable=too-many-arguments
+    e_from: str,
+    e_to: List[str],
+    mime_msg: MIMEMultipart,
+    config: Dict[str, Any],
+    dryrun: bool = False,
+    session: Optional[SMTPSession] = None,
+) -> None:
+    if not dryrun:
+        if session is not None:
+            session.sendmail(e_from, e_to, mime_msg)
+        else:
+            with SMTPSession(config) as single_use_session:
+                single_use_session.sendmail(e_from, e_to, mime_msg)
     else:
         logger.info("Dryrun enabled, email notification content is below:")
         logger.info(mime_msg.as_string())
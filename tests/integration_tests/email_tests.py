@@ -17,6 +17,7 @@
 # under the License.
 """Unit tests for email service in Superset"""
 import logging
+import smtplib
 import tempfile
 import unittest
 from email.mime.application import MIMEApplication
@@ -93,6 +94,20 @@ class TestEmailSmtp(SupersetTestCase):
         mimeapp = MIMEImage(image)
         assert msg.get_payload()[-1].get_payload() == mimeapp.get_payload()
 
+    @mock.patch("superset.utils.core.send_mime_email")
+    def test_send_smtp_encoded_inline_images(self, mock_send_mime):
+        image = utils.InlineImage(read_fixture("sample.png"))
+        for _ in range(2):
+            utils.send_email_smtp(
+                "to", "subject", "content", app.config, images=dict(blah=image)
+            )
+        expected = MIMEImage(bytes(image))
+        for call_args in mock_send_mime.call_args_list:
+            mimeimage = call_args[0][2].get_payload()[-1]
+            assert mimeimage.get_content_type() == expected.get_content_type()
+            assert mimeimage["Content-Transfer-Encoding"] == "base64"
+            assert mimeimage.get_payload() == expected.get_payload()
+
     @mock.patch("superset.utils.core.send_mime_email")
     def test_send_bcc_smtp(self, mock_send_mime):
         attachment = tempfile.NamedTemporaryFile()
@@ -163,6 +178,66 @@ class TestEmailSmtp(SupersetTestCase):
         app.config["SMTP_USER"] = smtp_user
         app.config["SMTP_PASSWORD"] = smtp_password
 
+    @mock.patch("smtplib.SMTP_SSL")
+    @mock.patch("smtplib.SMTP")
+    def test_send_mime_session(self, mock_smtp, mock_smtp_ssl):
+        mock_smtp.return_value = mock.Mock()
+        mock_smtp_ssl.return_value = mock.Mock()
+        with utils.SMTPSession(app.config) as session:
+            assert not mock_smtp.called
+            utils.send_mime_email(
+                "from", "to", MIMEMultipart(), app.config, session=session
+            )
+            utils.send_mime_email(
+                "from", "to", MIMEMultipart(), app.config, session=session
+            )
+            assert not mock_smtp.return_value.quit.called
+        assert mock_smtp.call_count == 1
+        assert mock_smtp.return_value.sendmail.call_count == 2
+        assert mock_smtp.return_value.quit.call_count == 1
+
+    @mock.patch("smtplib.SMTP_SSL")
+    @mock.patch("smtplib.SMTP")
+    def test_send_mime_session_reconnect(self, mock_smtp, mock_smtp_ssl):
+        first_smtp, second_smtp = mock.Mock(), mock.Mock()
+        first_smtp.sendmail.side_effect = [None, smtplib.SMTPServerDisconnected()]
+        mock_smtp.side_effect = [first_smtp, second_smtp]
+        mock_smtp_ssl.return_value = mock.Mock()
+        with utils.SMTPSession(app.config) as session:
+            utils.send_mime_email(
+                "from", "to", MIMEMultipart(), app.config, session=session
+            )
+            # the reused connection is dropped, the email is retried on a new one
+            utils.send_mime_email(
+                "from", "to", MIMEMultipart(), app.config, session=session
+            )
+        assert mock_smtp.call_count == 2
+        assert first_smtp.sendmail.call_count == 2
+        assert first_smtp.close.called
+        assert second_smtp.sendmail.call_count == 1
+        assert second_smtp.quit.call_count == 1
+
+    @mock.patch("smtplib.SMTP_SSL")
+    @mock.patch("smtplib.SMTP")
+    def test_send_mime_session_closing_connection(self, mock_smtp, mock_smtp_ssl):
+        first_smtp, second_smtp = mock.Mock(), mock.Mock()
+        first_smtp.sendmail.side_effect = smtplib.SMTPDataError(421, "closing")
+        mock_smtp.side_effect = [first_smtp, second_smtp]
+        mock_smtp_ssl.return_value = mock.Mock()
+        with utils.SMTPSession(app.config) as session:
+            # a new connection isn't retried
+            with self.assertRaises(smtplib.SMTPDataError):
+                utils.send_mime_email(
+                    "from", "to", MIMEMultipart(), app.config, session=session
+                )
+            utils.send_mime_email(
+                "from", "to", MIMEMultipart(), app.config, session=session
+            )
+        assert mock_smtp.call_count == 2
+        assert first_smtp.sendmail.call_count == 1
+        assert not first_smtp.quit.called
+        assert second_smtp.sendmail.call_count == 1
+
     @mock.patch("smtplib.SMTP_SSL")
     @mock.patch("smtplib.SMTP")
     def test_send_mime_dryrun(self, mock_smtp, mock_smtp_ssl):
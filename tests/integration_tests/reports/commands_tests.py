@@ -18,7 +18,7 @@ import json
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 from uuid import uuid4
 
 import pytest
@@ -229,6 +229,30 @@ def create_report_email_chart():
         cleanup_report_schedule(report_schedule)
 
 
+@pytest.fixture()
+def create_report_email_chart_multiple_recipients():
+    with app.app_context():
+        chart = db.session.query(Slice).first()
+        report_schedule = create_report_notification(
+            email_target="target1@email.com", chart=chart
+        )
+        for recipient_type, target in (
+            (ReportRecipientType.EMAIL, "target2@email.com"),
+            (ReportRecipientType.EMAIL, "target3@email.com"),
+            (ReportRecipientType.SLACK, "slack_channel"),
+        ):
+            report_schedule.recipients.append(
+                ReportRecipients(
+                    type=recipient_type,
+                    recipient_config_json=json.dumps({"target": target}),
+                )
+            )
+        db.session.commit()
+        yield report_schedule
+
+        cleanup_report_schedule(report_schedule)
+
+
 @pytest.fixture()
 def create_report_email_chart_force_screenshot():
     with app.app_context():
@@ -1364,6 +1388,108 @@ def test_email_dashboard_report_fails(
     assert_log(ReportState.ERROR, error_message="Could not connect to SMTP XPTO")
 
 
+@pytest.mark.usefixtures(
+    "load_birth_names_dashboard_with_slices",
+    "create_report_email_chart_multiple_recipients",
+)
+@patch("superset.reports.notifications.slack.SlackNotification.send")
+@patch("superset.reports.notifications.email.EmailNotification.send_many")
+@patch("superset.utils.screenshots.ChartScreenshot.get_screenshot")
+def test_email_chart_report_schedule_multiple_recipients(
+    screenshot_mock,
+    send_many_mock,
+    slack_send_mock,
+    create_report_email_chart_multiple_recipients,
+):
+    """
+    ExecuteReport Command: Test that the emails of a report are sent together,
+    and the other notifications one by one
+    """
+    screenshot_mock.return_value = SCREENSHOT_FILE
+    send_many_mock.return_value = []
+
+    with freeze_time("2020-01-01T00:00:00Z"):
+        AsyncExecuteReportScheduleCommand(
+            TEST_ID, create_report_email_chart_multiple_recipients.id, datetime.utcnow()
+        ).run()
+
+        send_many_mock.assert_called_once()
+        notifications = send_many_mock.call_args[0][0]
+        assert [
+            json.loads(notification._recipient.recipient_config_json)["target"]
+            for notification in notifications
+        ] == ["target1@email.com", "target2@email.com", "target3@email.com"]
+        assert send_many_mock.call_args[1]["concurrency"] == 1
+        slack_send_mock.assert_called_once()
+        assert_log(ReportState.SUCCESS)
+
+
+@pytest.mark.usefixtures(
+    "load_birth_names_dashboard_with_slices",
+    "create_report_email_chart_multiple_recipients",
+)
+@patch.dict(app.config, EMAIL_REPORTS_MAX_CONCURRENT_SENDS=2)
+@patch("superset.reports.notifications.slack.SlackNotification.send")
+@patch("superset.reports.notifications.email.SMTPSession")
+@patch("superset.reports.notifications.email.send_email_smtp")
+@patch("superset.utils.screenshots.ChartScreenshot.get_screenshot")
+def test_email_chart_report_schedule_concurrent_sends(
+    screenshot_mock,
+    email_mock,
+    smtp_session_mock,
+    slack_send_mock,
+    create_report_email_chart_multiple_recipients,
+):
+    """
+    ExecuteReport Command: Test that concurrent emails reuse one SMTP session per
+    worker, and that a failed email doesn't stop the other ones
+    """
+    from smtplib import SMTPException
+
+    screenshot_mock.return_value = SCREENSHOT_FILE
+    sessions = []
+
+    def new_session(config):
+        session = MagicMock()
+        session.__enter__.return_value = session
+        sessions.append(session)
+        return session
+
+    def send_email(to, *args, **kwargs):
+        if to == "target2@email.com":
+            raise SMTPException("Could not send to target2")
+
+    smtp_session_mock.side_effect = new_session
+    email_mock.side_effect = send_email
+
+    with pytest.raises(ReportScheduleNotificationError):
+        AsyncExecuteReportScheduleCommand(
+            TEST_ID, create_report_email_chart_multiple_recipients.id, datetime.utcnow()
+        ).run()
+
+    email_sessions = {
+        call.args[0]: call.kwargs["smtp_session"] for call in email_mock.call_args_list
+    }
+    # the report is sent to all its recipients, then the error to its owner
+    assert sorted(email_sessions) == [
+        OWNER_EMAIL,
+        "target1@email.com",
+        "target2@email.com",
+        "target3@email.com",
+    ]
+    # each worker thread sends all its emails over its own session
+    worker_sessions = {
+        id(email_sessions[target]): email_sessions[target]
+        for target in ("target1@email.com", "target2@email.com", "target3@email.com")
+    }
+    assert 1 <= len(worker_sessions) <= 2
+    assert len(sessions) == len(worker_sessions) + 1
+    for session in worker_sessions.values():
+        session.close.assert_called_once()
+    slack_send_mock.assert_called_once()
+    assert_log(ReportState.ERROR, error_message="Could not send to target2")
+
+
 @pytest.mark.usefixtures(
     "load_birth_names_dashboard_with_slices", "create_alert_email_chart"
 )
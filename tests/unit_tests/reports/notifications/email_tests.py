@@ -0,0 +1,179 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# pylint: disable=import-outside-toplevel, unused-argument
+import json
+import time
+from typing import Any, List, Optional
+
+import pytest
+from pytest_mock import MockFixture
+
+from superset.models.reports import ReportRecipients, ReportRecipientType
+
+
+def make_recipients(*targets: str) -> List[ReportRecipients]:
+    return [
+        ReportRecipients(
+            type=ReportRecipientType.EMAIL,
+            recipient_config_json=json.dumps({"target": target}),
+        )
+        for target in targets
+    ]
+
+
+def test_render_content_once(app_context: None, mocker: MockFixture) -> None:
+    """
+    Test that concurrent sends of the same content only render it once.
+    """
+    from superset.reports.notifications.base import NotificationContent
+    from superset.reports.notifications.email import EmailNotification
+
+    render_content = EmailNotification._render_content
+
+    def slow_render_content(notification: EmailNotification) -> Any:
+        time.sleep(0.05)
+        return render_content(notification)
+
+    mock_render_content = mocker.patch.object(
+        EmailNotification,
+        "_render_content",
+        autospec=True,
+        side_effect=slow_render_content,
+    )
+    mock_send_email_smtp = mocker.patch(
+        "superset.reports.notifications.email.send_email_smtp"
+    )
+    content = NotificationContent(name="test", screenshots=[b"image"])
+    notifications = [
+        EmailNotification(recipient, content)
+        for recipient in make_recipients(*[f"{i}@example.com" for i in range(4)])
+    ]
+
+    assert EmailNotification.send_many(notifications, concurrency=4) == []
+    assert mock_render_content.call_count == 1
+    assert mock_send_email_smtp.call_count == 4
+    bodies = {call.args[2] for call in mock_send_email_smtp.call_args_list}
+    assert len(bodies) == 1
+
+
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_send_many_unexpected_error(
+    app_context: None, mocker: MockFixture, concurrency: int
+) -> None:
+    """
+    Test that errors other than ``NotificationError`` aren't swallowed.
+    """
+    from superset.reports.notifications.base import NotificationContent
+    from superset.reports.notifications.email import EmailNotification
+
+    mocker.patch.object(
+        EmailNotification, "_get_content", side_effect=RuntimeError("unexpected")
+    )
+    mock_send_email_smtp = mocker.patch(
+        "superset.reports.notifications.email.send_email_smtp"
+    )
+    content = NotificationContent(name="test")
+    notifications = [
+        EmailNotification(recipient, content)
+        for recipient in make_recipients("1@example.com", "2@example.com")
+    ]
+
+    with pytest.raises(RuntimeError, match="unexpected"):
+        EmailNotification.send_many(notifications, concurrency=concurrency)
+    assert not mock_send_email_smtp.called
+
+
+@pytest.mark.parametrize(
+    "description,expected,unexpected",
+    [
+        ("Daily sales, 50% up", "<p>Daily sales, 50% up</p>", None),
+        ("<b>bold</b> <em>text</em>", "<p><b>bold</b> <em>text</em></p>", None),
+        (
+            '<a href="https://example.com" title="site">link</a>',
+            'href="https://example.com" title="site"',
+            None,
+        ),
+        (
+            "<script>alert(1)</script>hi",
+            "<p>&lt;script&gt;alert(1)&lt;/script&gt;hi</p>",
+            "<script>",
+        ),
+        ("Sales for <Region A>", "<p>Sales for &lt;Region A&gt;</p>", None),
+        ('<a href="javascript:alert(1)">link</a>', ">link</a>", "javascript:"),
+        ('<a href="ftp://example.com">link</a>', ">link</a>", "ftp:"),
+        ("1 < 2 & 3", "<p>1 &lt; 2 &amp; 3</p>", None),
+    ],
+)
+def test_description_sanitization(
+    app_context: None, description: str, expected: str, unexpected: Optional[str]
+) -> None:
+    """
+    Test that report descriptions keep the allowed markup, and show the other
+    tags as text.
+    """
+    from superset.reports.notifications.base import NotificationContent
+    from superset.reports.notifications.email import EmailNotification
+
+    content = NotificationContent(name="test", description=description)
+    (recipient,) = make_recipients("1@example.com")
+    body = EmailNotification(recipient, content)._get_content().body
+
+    assert expected in body
+    if unexpected is not None:
+        assert unexpected not in body
+
+
+def test_send_batch(app_context: None, mocker: MockFixture) -> None:
+    """
+    Test that a batch is addressed to the first recipient and blind copies the
+    other ones.
+    """
+    from superset.reports.notifications.base import NotificationContent
+    from superset.reports.notifications.email import EmailNotification
+
+    mock_send_email_smtp = mocker.patch(
+        "superset.reports.notifications.email.send_email_smtp"
+    )
+    recipients = make_recipients(
+        "1@example.com,2@example.com", "3@example.com", "4@example.com"
+    )
+    notification = EmailNotification(recipients[0], NotificationContent(name="test"))
+
+    notification.send_batch(recipients)
+
+    mock_send_email_smtp.assert_called_once()
+    assert mock_send_email_smtp.call_args.args[0] == "1@example.com,2@example.com"
+    assert mock_send_email_smtp.call_args.kwargs["bcc"] == "3@example.com,4@example.com"
+
+
+def test_send_batch_no_recipients(app_context: None, mocker: MockFixture) -> None:
+    """
+    Test that sending a batch without recipients fails with a ``NotificationError``.
+    """
+    from superset.reports.notifications.base import NotificationContent
+    from superset.reports.notifications.email import EmailNotification
+    from superset.reports.notifications.exceptions import NotificationError
+
+    mock_send_email_smtp = mocker.patch(
+        "superset.reports.notifications.email.send_email_smtp"
+    )
+    (recipient,) = make_recipients("1@example.com")
+    notification = EmailNotification(recipient, NotificationContent(name="test"))
+
+    with pytest.raises(NotificationError):
+        notification.send_batch([])
+    assert not mock_send_email_smtp.called